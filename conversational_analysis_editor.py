@@ -2,8 +2,124 @@
 import curses
 import sys
 import os
+import re
+import bisect
+import functools
+from collections import deque
+
+# Characters after which no space is inserted when combining entries.
+_END_PUNCT = frozenset('.!?,:;')
+# Entries containing square brackets are never combined.
+_BRACKETS = re.compile(r'[\[\]]')
+
+# Entries shorter than this are wrapped in Python; below ~2k characters the
+# compiled kernel is no faster once its call overhead is counted.
+_JIT_MIN_LEN = 2048
+
+# Compiled wrap kernel and numpy module, set by _load_wrap_kernel() if numba is available.
+_wrap_offsets = None
+_np = None
+_wrap_kernel_tried = False
+
+def _load_wrap_kernel():
+    """
+    Import numba and compile the wrap kernel, once. Both are slow (numba
+    import plus JIT compile takes most of a second), so this is only done
+    when a file with long entries is opened, never from a keystroke.
+    Returns the kernel, or None if numba isn't installed.
+    """
+    global _wrap_offsets, _np, _wrap_kernel_tried
+    if _wrap_kernel_tried:
+        return _wrap_offsets
+    _wrap_kernel_tried = True
+    try:
+        import numpy as np
+        from numba import njit
+    except ImportError:  # numba is optional; wrapping falls back to pure Python
+        return None
+
+    @njit(cache=True)
+    def wrap_offsets(codes, max_width):
+        """
+        Compiled core of _wrap_text: given the text's code points, return an
+        array of (start, end) offsets of each wrapped line.
+        """
+        n = len(codes)
+        out = np.empty((n, 2), np.int64)
+        count = 0
+        start = 0
+        while start < n:
+            if n - start <= max_width:
+                out[count, 0] = start
+                out[count, 1] = n
+                count += 1
+                break
+            # Last space in text[start:start+max_width+1], ignoring one at start
+            break_index = -1
+            j = start + max_width
+            while j > start:
+                if codes[j] == 32:
+                    break_index = j - start
+                    break
+                j -= 1
+            out[count, 0] = start
+            if break_index == -1:
+                out[count, 1] = start + max_width
+                start += max_width
+            else:
+                out[count, 1] = start + break_index
+                start += break_index + 1  # Skip the space
+            count += 1
+        return out[:count]
+
+    # Compile now (or load the on-disk cache) rather than on the first wrap.
+    wrap_offsets(np.zeros(1, dtype=np.uint32), 1)
+    _np = np
+    _wrap_offsets = wrap_offsets
+    return wrap_offsets
+
+@functools.lru_cache(maxsize=4096)
+def _wrap_text(text, width):
+    """
+    Wrap text into a tuple of (start_offset, substring) tuples,
+    trying to break at spaces when possible.
+    Enforces a maximum line length of 50 characters.
+    Results are cached, since most entries are unchanged between reflows.
+    """
+    # Enforce maximum width of 50 characters
+    max_width = min(width, 50)
+    
+    if _wrap_offsets is not None and len(text) >= _JIT_MIN_LEN and max_width > 0:
+        # UTF-32 gives one array element per character, so offsets match str indices.
+        codes = _np.frombuffer(text.encode('utf-32-le'), dtype=_np.uint32)
+        offsets = _wrap_offsets(codes, max_width).tolist()
+        return tuple((start, text[start:end]) for start, end in offsets)
+    
+    lines = []
+    start = 0
+    while start < len(text):
+        remaining = len(text) - start
+        if remaining <= max_width:
+            lines.append((start, text[start:]))
+            break
+        segment = text[start:start+max_width+1]
+        break_index = segment.rfind(" ")
+        if break_index == -1 or break_index == 0:
+            lines.append((start, text[start:start+max_width]))
+            start += max_width
+        else:
+            lines.append((start, text[start:start+break_index]))
+            start += break_index + 1  # Skip the space
+    return tuple(lines)
 
 class DialogueEntry:
+    """
+    One speaker turn. Entries are treated as immutable once they are in
+    Editor.entries: edits replace the entry with a new DialogueEntry, which
+    lets undo snapshots share entry objects instead of copying them.
+    """
+    __slots__ = ('speaker', 'text')  # No per-instance __dict__; documents can hold many entries
+
     def __init__(self, speaker, text):
         self.speaker = speaker
         self.text = text
@@ -13,7 +129,12 @@ class Editor:
         self.stdscr = stdscr
         self.filename = filename
         self.entries = []
-        self.display_lines = []  # Each element: (entry_index, offset, display_text)
+        # Display lines, as parallel lists indexed by display line number:
+        self._dl_entry = []  # index of the entry the line belongs to
+        self._dl_offset = []  # offset of the line's first character in the entry's text
+        self._dl_text = []  # text shown on the line
+        self._wrap_cache = {}  # entry_index -> (text, width, line offsets, line texts)
+        self._entry_line_starts = []  # Display line number of each entry's first line
         self.cursor_display_line = 0  # Which display line the cursor is on
         self.cursor_field = 'content'  # Either 'speaker' or 'content'
         self.cursor_pos = 0  # Position within the current field's text
@@ -21,14 +142,30 @@ class Editor:
         self.scroll_offset = 0  # New: Track how many lines we've scrolled
         self.keystroke_count = 0
         self.autosave_interval = 10  # Define autosave_interval
-        self.undo_stack = []  # New: Stack for undo functionality
+        self._dirty = False  # Entries changed since the last autosave
+        self._autosaved_text = None  # Contents of the swap file as last written
+        self.undo_stack = deque(maxlen=100)  # New: Stack for undo functionality; oldest states fall off
+        self._last_edit_kind = None  # 'insert' while a run of typed characters is in progress
+        self._edit_run_len = 0  # Characters typed since the last undo snapshot
+        self._key_handlers = self.build_key_handlers()
         self.initial_load = True  # Flag to track initial load
 
+        # What render() last drew on each screen row (line number, speaker, text),
+        # so unchanged rows can be skipped.
+        self._shadow = []
+        self._shadow_size = None
+        self._shadow_scroll = 0
+        self._shadow_status = None
+        self._needs_render = True  # Set by process_key when the screen may be out of date
+
         # Fixed column widths.
         self.ln_width = 6      # line number column width
         self.sp_width = 15     # speaker name column width
         self.col_sep = 1       # separator
 
+        # Window size, refreshed only on KEY_RESIZE rather than queried on every use.
+        self.update_size()
+
         # Load file if provided; else start with one default entry.
         if filename:
             self.load_file(filename)
@@ -42,14 +179,15 @@ class Editor:
 
     def load_file(self, filename):
         try:
-            with open(filename, 'r') as f:
-                for line in f:
-                    line = line.rstrip("\n")
-                    parts = line.split("\t", 1)
-                    if len(parts) == 2:
-                        self.entries.append(DialogueEntry(parts[0], parts[1]))
-                    else:
-                        self.entries.append(DialogueEntry(parts[0], ""))
+            with open(filename, 'r', buffering=1 << 17) as f:
+                data = f.read()
+            lines = data.split("\n")
+            if lines[-1] == "":
+                lines.pop()  # Trailing newline (or empty file)
+            # partition() yields (speaker, tab, text); text is "" when there is no tab.
+            self.entries.extend(DialogueEntry(*line.partition("\t")[::2]) for line in lines)
+            if any(len(entry.text) >= _JIT_MIN_LEN for entry in self.entries):
+                _load_wrap_kernel()
         except Exception as e:
             self.status_msg = f"Error loading file: {e}"
 
@@ -58,16 +196,19 @@ class Editor:
             self.status_msg = "No filename provided."
             return
         try:
-            with open(self.filename, 'w') as f:
-                for entry in self.entries:
-                    f.write(f"{entry.speaker}\t{entry.text}\n")
+            with open(self.filename, 'w', buffering=1 << 17) as f:
+                f.write(self.format_entries())
             self.status_msg = "File saved."
         except Exception as e:
             self.status_msg = f"Error saving file: {e}"
 
+    def format_entries(self):
+        """Return the whole document in the tab-separated file format."""
+        return "".join([f"{entry.speaker}\t{entry.text}\n" for entry in self.entries])
+
     def reflow(self):
         """
-        Recalculate display_lines from self.entries based on the current window size.
+        Recalculate the display lines from self.entries based on the current window size.
         Also performs automatic reflowing of consecutive entries with the same speaker
         (unless they contain square brackets).
         """
@@ -76,22 +217,37 @@ class Editor:
         if self.initial_load:
             self.combine_same_speaker_entries()
         
-        self.display_lines = []
-        height, width = self.stdscr.getmaxyx()
-        content_width = width - (self.ln_width + self.sp_width + 2 * self.col_sep)
+        dl_entry = self._dl_entry = []
+        dl_offset = self._dl_offset = []
+        dl_text = self._dl_text = []
+        self._entry_line_starts = []
+        content_width = self._content_width
         
-        # Process each dialogue entry.
+        # Process each dialogue entry, re-wrapping only entries whose text or width changed.
+        wrap_cache = self._wrap_cache
         for entry_idx, entry in enumerate(self.entries):
-            wrapped = self.wrap_text(entry.text, content_width)
-            if not wrapped:
-                wrapped = [(0, "")]
+            cached = wrap_cache.get(entry_idx)
+            if cached is not None and cached[1] == content_width and cached[0] == entry.text:
+                offsets, texts = cached[2], cached[3]
+            else:
+                wrapped = _wrap_text(entry.text, content_width)
+                if not wrapped:
+                    wrapped = ((0, ""),)
+                offsets = [offset for offset, _ in wrapped]
+                texts = [line for _, line in wrapped]
+                wrap_cache[entry_idx] = (entry.text, content_width, offsets, texts)
             
-            for offset, line in wrapped:
-                self.display_lines.append((entry_idx, offset, line))
+            self._entry_line_starts.append(len(dl_text))
+            dl_entry.extend([entry_idx] * len(texts))
+            dl_offset.extend(offsets)
+            dl_text.extend(texts)
+        # Drop cache slots for entries that no longer exist.
+        for entry_idx in range(len(self.entries), len(wrap_cache)):
+            wrap_cache.pop(entry_idx, None)
         
         # Clamp cursor if needed.
-        if self.cursor_display_line >= len(self.display_lines):
-            self.cursor_display_line = len(self.display_lines) - 1
+        if self.cursor_display_line >= len(self._dl_text):
+            self.cursor_display_line = len(self._dl_text) - 1
             self.cursor_pos = 0
         cur_len = self.get_current_field_length()
         if self.cursor_pos > cur_len:
@@ -101,95 +257,92 @@ class Editor:
         """
         Combine consecutive entries with the same speaker if they don't contain square brackets.
         """
-        i = 0
-        while i < len(self.entries) - 1:
-            current = self.entries[i]
-            next_entry = self.entries[i + 1]
-            
-            # Check if entries have the same speaker and neither contains square brackets
-            if (current.speaker == next_entry.speaker and 
-                '[' not in current.text and ']' not in current.text and
-                '[' not in next_entry.text and ']' not in next_entry.text):
+        combined = []
+        last_plain = False  # Whether combined[-1] is free of square brackets
+        for entry in self.entries:
+            # One scan per entry; a merge of two bracket-free entries stays bracket-free.
+            plain = _BRACKETS.search(entry.text) is None
+            if combined and plain and last_plain:
+                current = combined[-1]
                 
-                # Check if combining would exceed max line length
-                combined_length = len(current.text) + 1 + len(next_entry.text)  # +1 for space
-                if combined_length <= 150:  # Allow for multiple wrapped lines
-                    # Add a space if the current entry doesn't end with punctuation
-                    if current.text and current.text[-1] not in '.!?,:;':
-                        current.text += ' '
-                    
-                    # Combine the entries
-                    current.text += next_entry.text
-                    
-                    # Remove the next entry
-                    self.entries.pop(i + 1)
+                # Check if entries have the same speaker (neither contains square brackets)
+                if current.speaker == entry.speaker:
                     
-                    # Don't increment i, so we check the new next entry
-                    continue
+                    # Check if combining would exceed max line length
+                    combined_length = len(current.text) + 1 + len(entry.text)  # +1 for space
+                    if combined_length <= 150:  # Allow for multiple wrapped lines
+                        # Add a space if the current entry doesn't end with punctuation
+                        sep = ''
+                        if current.text and current.text[-1] not in _END_PUNCT:
+                            sep = ' '
+                        
+                        # Combine the entries; the result may absorb the next one too
+                        combined[-1] = DialogueEntry(current.speaker, current.text + sep + entry.text)
+                        continue
             
-            i += 1
-
-    def wrap_text(self, text, width):
-        """
-        Wrap text into a list of (start_offset, substring) tuples,
-        trying to break at spaces when possible.
-        Enforces a maximum line length of 50 characters.
-        """
-        # Enforce maximum width of 50 characters
-        max_width = min(width, 50)
-        
-        lines = []
-        start = 0
-        while start < len(text):
-            remaining = len(text) - start
-            if remaining <= max_width:
-                lines.append((start, text[start:]))
-                break
-            segment = text[start:start+max_width+1]
-            break_index = segment.rfind(" ")
-            if break_index == -1 or break_index == 0:
-                lines.append((start, text[start:start+max_width]))
-                start += max_width
-            else:
-                lines.append((start, text[start:start+break_index]))
-                start += break_index + 1  # Skip the space
-        return lines
+            combined.append(entry)
+            last_plain = plain
+        self.entries = combined
 
     def render(self):
-        # Use erase() plus double-buffering to avoid flashing.
-        self.stdscr.erase()
-        height, width = self.stdscr.getmaxyx()
-        content_width = width - (self.ln_width + self.sp_width + 2 * self.col_sep)
+        # Only rewrite the rows that changed since the last frame; curses then
+        # diffs the window against the terminal in noutrefresh()/doupdate().
+        height, width = self._size
+        content_width = self._content_width
         max_display_lines = height - 1  # Reserve bottom line for status
 
+        if self._shadow_size != (height, width):
+            # Window was resized (or this is the first frame): start from a blank slate.
+            self.stdscr.erase()
+            self._shadow = [None] * max_display_lines
+            self._shadow_size = (height, width)
+            self._shadow_scroll = self.scroll_offset
+            self._shadow_status = None
+        elif self.scroll_offset != self._shadow_scroll:
+            self.scroll_shadow(self.scroll_offset - self._shadow_scroll)
+
         # Apply scroll offset to determine which lines to display
         start_line = self.scroll_offset
-        end_line = min(start_line + max_display_lines, len(self.display_lines))
-        
-        # Render visible lines
-        for i, line_idx in enumerate(range(start_line, end_line)):
-            entry_idx, offset, line_text = self.display_lines[line_idx]
-            entry = self.entries[entry_idx]
-            ln_str = str(line_idx+1).rjust(self.ln_width)
-            try:
-                self.stdscr.addstr(i, 0, ln_str)
-            except curses.error:
-                pass
-            sp_str = entry.speaker.ljust(self.sp_width)
+        end_line = min(start_line + max_display_lines, len(self._dl_text))
+        sep = ' ' * self.col_sep
+        # A speaker name longer than its column runs into the separator, as before.
+        sp_end = self.sp_width + self.col_sep
+
+        # Render visible lines, each as one preformatted string. The shadow
+        # holds the inputs each row was drawn from, so the string is only
+        # built for rows that changed.
+        for i in range(max_display_lines):
+            line_idx = start_line + i
+            if line_idx < end_line:
+                key = (line_idx, self.entries[self._dl_entry[line_idx]].speaker, self._dl_text[line_idx])
+            else:
+                key = ()
+            if key == self._shadow[i]:
+                continue
             try:
-                self.stdscr.addstr(i, self.ln_width + self.col_sep, sp_str)
+                if key:
+                    _, speaker, line_text = key
+                    ln_str = str(line_idx+1).rjust(self.ln_width)
+                    sp_str = (speaker.ljust(self.sp_width) + sep)[:sp_end]
+                    content_str = line_text.ljust(content_width)
+                    # Clip so an overlong row can't wrap onto the next one.
+                    self.stdscr.addstr(i, 0, f"{ln_str}{sep}{sp_str}{content_str}"[:width])
+                else:
+                    # Past the end of the document: blank out whatever was there.
+                    self.stdscr.move(i, 0)
+                    self.stdscr.clrtoeol()
             except curses.error:
                 pass
-            content_str = line_text.ljust(content_width)
+            self._shadow[i] = key
+
+        if self.status_msg != self._shadow_status:
             try:
-                self.stdscr.addstr(i, self.ln_width + self.sp_width + 2 * self.col_sep, content_str)
+                self.stdscr.move(height-1, 0)
+                self.stdscr.clrtoeol()
+                self.stdscr.addstr(height-1, 0, self.status_msg[:width-1])
             except curses.error:
                 pass
-
-        try:
-            self.stdscr.addstr(height-1, 0, self.status_msg[:width-1])
-        except curses.error:
-            pass
+            self._shadow_status = self.status_msg
 
         # Compute cursor x coordinate.
         if self.cursor_field == 'speaker':
@@ -213,8 +366,37 @@ class Editor:
 
         self.stdscr.noutrefresh()
         curses.doupdate()
+        self._needs_render = False
+
+    def scroll_shadow(self, delta):
+        """
+        Scroll the text area by delta rows (positive scrolls the text up) and
+        shift the shadow buffer to match, so only newly exposed rows get redrawn.
+        """
+        self._shadow_scroll = self.scroll_offset
+        rows = len(self._shadow)
+        if abs(delta) >= rows:
+            self._shadow = [None] * rows
+            return
+        try:
+            # Limit scrolling to the text area so the status line stays put.
+            self.stdscr.setscrreg(0, rows - 1)
+            self.stdscr.scrollok(True)
+            self.stdscr.scroll(delta)
+            self.stdscr.scrollok(False)
+        except curses.error:
+            self.stdscr.scrollok(False)
+            self._shadow = [None] * rows
+            return
+        if delta > 0:
+            del self._shadow[:delta]
+            self._shadow += [None] * delta
+        else:
+            del self._shadow[delta:]
+            self._shadow[:0] = [None] * -delta
 
     def process_key(self, key):
+        prev_status = self.status_msg
         self.status_msg = ""
         
         # Increment keystroke counter and check for autosave
@@ -223,179 +405,198 @@ class Editor:
             self.autosave()
             self.keystroke_count = 0
         
-        # Debug key code if it's a control character
-        if key < 32 and key != 9 and key != 10:  # Not tab or enter
+        handler = self._key_handlers.get(key)
+        if handler is not None or not 32 <= key <= 126:
+            # Anything other than typing a character ends the current run of inserts.
+            self._last_edit_kind = None
+        
+        if handler is not None:
+            handler()
+            self._needs_render = True
+        elif key < 32:
+            # Debug key code if it's a control character
             self.status_msg = f"Control key pressed: ASCII {key}"
-            return
-            
-        # Handle Ctrl+\ (ASCII 28) specifically
-        if key == 28:  # Ctrl+\
-            self.status_msg = "Ctrl+\\ pressed (ignored)"
-            return
-            
-        # Single key shortcuts
-        if key == ord('\\') and self.cursor_field == 'speaker':  # \ to clear speaker
-            self.save_undo_state()
-            entry_idx, _, _ = self.display_lines[self.cursor_display_line]
-            self.entries[entry_idx].speaker = ""
-            self.cursor_pos = 0
-            self.reflow()
-            return
-        if key == ord('`'):  # ` to save
-            self.save_file()
-            return
-        if key == ord('~'):  # ~ to quit
-            raise KeyboardInterrupt
-        if key == curses.KEY_DC:  # Delete key for undo
-            self.undo()
-            return
+        elif key <= 126:
+            # Printable characters (32-126) that aren't shortcuts
+            self.handle_insert(chr(key))
+            self._needs_render = True
+        # Other keys change nothing on screen, apart from the status line.
+        if self.status_msg != prev_status:
+            self._needs_render = True
+
+    def build_key_handlers(self):
+        """Map key codes to the methods handling them, for process_key."""
+        return {
+            9: self.on_tab,                  # Tab toggles active field.
+            10: self.on_enter,               # Enter splits the current dialogue entry.
+            curses.KEY_ENTER: self.on_enter,
+            19: self.save_file,              # Ctrl+S to save.
+            17: self.on_quit,                # Ctrl+Q to quit.
+            28: self.on_ignore,              # Ctrl+\ is ignored.
+            ord('\\'): self.on_backslash,    # \ to clear speaker
+            ord('`'): self.save_file,        # ` to save
+            ord('~'): self.on_quit,          # ~ to quit
+            curses.KEY_DC: self.undo,        # Delete key for undo
+            curses.KEY_HOME: self.on_home,
+            curses.KEY_END: self.on_end,
+            curses.KEY_PPAGE: self.move_entry_up,
+            curses.KEY_NPAGE: self.move_entry_down,
+            curses.KEY_UP: self.on_up,
+            curses.KEY_DOWN: self.on_down,
+            curses.KEY_LEFT: self.on_left,
+            curses.KEY_RIGHT: self.on_right,
+            curses.KEY_BACKSPACE: self.handle_backspace,
+            127: self.handle_backspace,
+            curses.KEY_RESIZE: self.on_resize,
+        }
 
-        # Shortcut: Home key moves cursor to beginning-of-line
-        if key == curses.KEY_HOME:
-            self.cursor_pos = 0
-            return
-            
-        # Shortcut: End key moves cursor to end-of-line in content.
-        if key == curses.KEY_END and self.cursor_field == 'content':
-            self.cursor_pos = self.get_current_field_length()
-            return
+    def update_size(self):
+        """Cache the window size and the resulting width of the content column."""
+        self._size = self.stdscr.getmaxyx()
+        self._content_width = self._size[1] - (self.ln_width + self.sp_width + 2 * self.col_sep)
 
-        # Move current entry up (Page Up)
-        if key == curses.KEY_PPAGE:
-            self.move_entry_up()
-            return
-            
-        # Move current entry down (Page Down)
-        if key == curses.KEY_NPAGE:
-            self.move_entry_down()
-            return
+    def on_resize(self):
+        """Re-wrap for the new width; the next render() then redraws everything."""
+        self.update_size()
+        self.reflow()
 
-        if key == 9:  # Tab toggles active field.
-            self.cursor_field = 'speaker' if self.cursor_field == 'content' else 'content'
-            self.cursor_pos = 0
-            return
-        if key == 19:  # Ctrl+S to save.
-            self.save_file()
+    def on_quit(self):
+        raise KeyboardInterrupt
+
+    def on_ignore(self):
+        self.status_msg = "Ctrl+\\ pressed (ignored)"
+
+    def on_backslash(self):
+        """Clear the speaker name; does nothing in the content field."""
+        if self.cursor_field != 'speaker':
             return
-        if key == 17:  # Ctrl+Q to quit.
-            raise KeyboardInterrupt
+        self.save_undo_state()
+        self._dirty = True
+        entry_idx = self._dl_entry[self.cursor_display_line]
+        self.entries[entry_idx] = DialogueEntry("", self.entries[entry_idx].text)
+        self.cursor_pos = 0
+        # No reflow: wrapping depends only on the text, and render() reads the speaker fresh.
+
+    def on_tab(self):
+        self.cursor_field = 'speaker' if self.cursor_field == 'content' else 'content'
+        self.cursor_pos = 0
+
+    def on_enter(self):
+        if self.cursor_field == 'content':
+            self.save_undo_state()
+            self.split_line_at_cursor()
+
+    def on_home(self):
+        """Move cursor to beginning-of-line."""
+        self.cursor_pos = 0
+
+    def on_end(self):
+        """Move cursor to end-of-line in content."""
+        if self.cursor_field == 'content':
+            self.cursor_pos = self.get_current_field_length()
 
-        # Handle Enter key (ASCII 10) to split the current dialogue entry.
-        if key in (10, curses.KEY_ENTER):
+    def on_up(self):
+        if self.cursor_display_line > 0:
+            self.cursor_display_line -= 1
+            self.cursor_pos = min(self.cursor_pos, self.get_current_field_length())
+            # Scroll up if needed
+            if self.cursor_display_line < self.scroll_offset:
+                self.scroll_offset = self.cursor_display_line
+
+    def on_down(self):
+        if self.cursor_display_line < len(self._dl_text) - 1:
+            self.cursor_display_line += 1
+            self.cursor_pos = min(self.cursor_pos, self.get_current_field_length())
+            # Scroll down if needed
+            height, _ = self._size
+            max_visible = height - 1  # Reserve bottom line for status
+            if self.cursor_display_line >= self.scroll_offset + max_visible:
+                self.scroll_offset = self.cursor_display_line - max_visible + 1
+
+    def on_left(self):
+        if self.cursor_pos > 0:
+            self.cursor_pos -= 1
+        else:
+            # If at beginning of a wrapped content line, move to the end of the previous wrap.
             if self.cursor_field == 'content':
-                self.save_undo_state()
-                self.split_line_at_cursor()
-            return
+                current_entry_idx = self._dl_entry[self.cursor_display_line]
+                if self.cursor_display_line > self._entry_line_starts[current_entry_idx]:
+                    self.cursor_display_line -= 1
+                    self.cursor_pos = len(self._dl_text[self.cursor_display_line])
 
-        # Navigation: Arrow keys.
-        if key == curses.KEY_UP:
-            if self.cursor_display_line > 0:
-                self.cursor_display_line -= 1
-                self.cursor_pos = min(self.cursor_pos, self.get_current_field_length())
-                # Scroll up if needed
-                if self.cursor_display_line < self.scroll_offset:
-                    self.scroll_offset = self.cursor_display_line
-            return
-        if key == curses.KEY_DOWN:
-            if self.cursor_display_line < len(self.display_lines) - 1:
+    def on_right(self):
+        if self.cursor_pos < self.get_current_field_length():
+            self.cursor_pos += 1
+        else:
+            # If at end of a content line, move to the beginning of the next line,
+            # whether it continues the same entry or starts a new one
+            if self.cursor_field == 'content' and self.cursor_display_line < len(self._dl_text) - 1:
                 self.cursor_display_line += 1
-                self.cursor_pos = min(self.cursor_pos, self.get_current_field_length())
+                self.cursor_pos = 0
+                
                 # Scroll down if needed
-                height, _ = self.stdscr.getmaxyx()
+                height, _ = self._size
                 max_visible = height - 1  # Reserve bottom line for status
                 if self.cursor_display_line >= self.scroll_offset + max_visible:
                     self.scroll_offset = self.cursor_display_line - max_visible + 1
-            return
-        if key == curses.KEY_LEFT:
-            if self.cursor_pos > 0:
-                self.cursor_pos -= 1
-            else:
-                # If at beginning of a wrapped content line, move to the end of the previous wrap.
-                if self.cursor_field == 'content':
-                    current_entry_idx, _, _ = self.display_lines[self.cursor_display_line]
-                    for i in range(self.cursor_display_line - 1, -1, -1):
-                        if self.display_lines[i][0] == current_entry_idx:
-                            self.cursor_display_line = i
-                            self.cursor_pos = len(self.display_lines[i][2])
-                            break
-            return
-        if key == curses.KEY_RIGHT:
-            if self.cursor_pos < self.get_current_field_length():
-                self.cursor_pos += 1
-            else:
-                # If at end of a content line, move to the beginning of the next line
-                if self.cursor_field == 'content' and self.cursor_display_line < len(self.display_lines) - 1:
-                    # Check if the next line is a continuation of the same entry or a new entry
-                    current_entry_idx, _, _ = self.display_lines[self.cursor_display_line]
-                    next_entry_idx, _, _ = self.display_lines[self.cursor_display_line + 1]
-                    
-                    # Move to the next line regardless of whether it's the same entry or not
-                    self.cursor_display_line += 1
-                    self.cursor_pos = 0
-                    
-                    # Scroll down if needed
-                    height, _ = self.stdscr.getmaxyx()
-                    max_visible = height - 1  # Reserve bottom line for status
-                    if self.cursor_display_line >= self.scroll_offset + max_visible:
-                        self.scroll_offset = self.cursor_display_line - max_visible + 1
-            return
-            
-        # Handle backspace
-        if key in (curses.KEY_BACKSPACE, 127):
-            self.handle_backspace()
-            return
-
-        # Only process printable characters (32-126, excluding our shortcuts)
-        if 32 <= key <= 126 and chr(key) not in ['\\', '`', '~']:
-            self.handle_insert(chr(key))
-            return
 
     def get_current_field_length(self):
-        entry_idx, offset, line_text = self.display_lines[self.cursor_display_line]
-        entry = self.entries[entry_idx]
         if self.cursor_field == 'speaker':
-            return len(entry.speaker)
+            return len(self.entries[self._dl_entry[self.cursor_display_line]].speaker)
         else:
-            return len(line_text)
+            return len(self._dl_text[self.cursor_display_line])
 
     def handle_insert(self, char):
-        self.save_undo_state()
-        entry_idx, offset, _ = self.display_lines[self.cursor_display_line]
+        # Coalesce a run of typed characters into one undo step, starting a new
+        # step at word boundaries and every 20 characters.
+        if self._last_edit_kind != 'insert' or char in ' \t' or self._edit_run_len >= 20:
+            self.save_undo_state()
+            self._edit_run_len = 0
+        self._last_edit_kind = 'insert'
+        self._edit_run_len += 1
+        self._dirty = True
+        entry_idx = self._dl_entry[self.cursor_display_line]
+        offset = self._dl_offset[self.cursor_display_line]
         entry = self.entries[entry_idx]
         if self.cursor_field == 'speaker':
-            entry.speaker = entry.speaker[:self.cursor_pos] + char + entry.speaker[self.cursor_pos:]
+            speaker = entry.speaker[:self.cursor_pos] + char + entry.speaker[self.cursor_pos:]
+            self.entries[entry_idx] = DialogueEntry(speaker, entry.text)
             self.cursor_pos += 1
-            self.reflow()
+            # No reflow needed; see on_backslash.
         else:
             old_actual_offset = offset + self.cursor_pos
-            entry.text = entry.text[:old_actual_offset] + char + entry.text[old_actual_offset:]
+            text = entry.text[:old_actual_offset] + char + entry.text[old_actual_offset:]
+            self.entries[entry_idx] = DialogueEntry(entry.speaker, text)
+            self._wrap_cache.pop(entry_idx, None)
             new_actual_offset = old_actual_offset + 1
             self.reflow()
             self.set_cursor_for_content(entry_idx, new_actual_offset)
 
     def handle_backspace(self):
         self.save_undo_state()
+        self._dirty = True
         if self.cursor_field == 'speaker':
-            entry_idx, _, _ = self.display_lines[self.cursor_display_line]
+            entry_idx = self._dl_entry[self.cursor_display_line]
             entry = self.entries[entry_idx]
             if self.cursor_pos > 0:
-                entry.speaker = entry.speaker[:self.cursor_pos-1] + entry.speaker[self.cursor_pos:]
+                speaker = entry.speaker[:self.cursor_pos-1] + entry.speaker[self.cursor_pos:]
+                self.entries[entry_idx] = DialogueEntry(speaker, entry.text)
                 self.cursor_pos -= 1
-            self.reflow()
+            # No reflow needed; see on_backslash.
             return
 
         # For content field:
-        entry_idx, offset, _ = self.display_lines[self.cursor_display_line]
+        entry_idx = self._dl_entry[self.cursor_display_line]
+        offset = self._dl_offset[self.cursor_display_line]
         entry = self.entries[entry_idx]
         actual_offset = offset + self.cursor_pos
 
         # If at beginning of a wrapped line (but not at the very start of text), just merge (move cursor)
+        # to the end of the line above, which is always the previous wrap of the same entry.
         if self.cursor_pos == 0 and offset > 0:
-            for i in range(self.cursor_display_line - 1, -1, -1):
-                if self.display_lines[i][0] == entry_idx:
-                    self.cursor_display_line = i
-                    self.cursor_pos = len(self.display_lines[i][2])
-                    return
+            self.cursor_display_line -= 1
+            self.cursor_pos = len(self._dl_text[self.cursor_display_line])
+            return
 
         # If at the beginning of an entry (not a wrapped line) and not the first entry
         if self.cursor_pos == 0 and offset == 0 and entry_idx > 0:
@@ -403,19 +604,16 @@ class Editor:
             prev_entry = self.entries[entry_idx - 1]
             
             # Check if combining would exceed content width
-            height, width = self.stdscr.getmaxyx()
-            content_width = width - (self.ln_width + self.sp_width + 2 * self.col_sep)
+            content_width = self._content_width
             
             # Only combine if the result won't be too long
             if len(prev_entry.text) + len(entry.text) <= content_width * 3:  # Allow reasonable wrapping
                 # Remember the length of the previous entry's text
                 prev_text_len = len(prev_entry.text)
                 
-                # Combine the entries
-                prev_entry.text += entry.text
-                
-                # Remove the current entry
-                self.entries.pop(entry_idx)
+                # Replace both entries with the combined one
+                merged = DialogueEntry(prev_entry.speaker, prev_entry.text + entry.text)
+                self.entries[entry_idx - 1:entry_idx + 1] = [merged]
                 
                 # Reflow to update display
                 self.reflow()
@@ -425,45 +623,40 @@ class Editor:
                 return
 
         if actual_offset > 0:
-            entry.text = entry.text[:actual_offset-1] + entry.text[actual_offset:]
+            text = entry.text[:actual_offset-1] + entry.text[actual_offset:]
+            self.entries[entry_idx] = DialogueEntry(entry.speaker, text)
+            self._wrap_cache.pop(entry_idx, None)
             new_actual_offset = actual_offset - 1
             self.reflow()
             self.set_cursor_for_content(entry_idx, new_actual_offset)
 
     def set_cursor_for_content(self, entry_idx, target_offset):
-        new_line_index = None
-        new_cursor_pos = 0
-        for i, (e_idx, off, line_text) in enumerate(self.display_lines):
-            if e_idx == entry_idx:
-                if off <= target_offset <= off + len(line_text):
-                    new_line_index = i
-                    new_cursor_pos = target_offset - off
-                    break
-                elif target_offset > off + len(line_text):
-                    continue
-        if new_line_index is None:
-            for i in range(len(self.display_lines)-1, -1, -1):
-                if self.display_lines[i][0] == entry_idx:
-                    new_line_index = i
-                    new_cursor_pos = len(self.display_lines[i][2])
-                    break
+        """Place the cursor at target_offset within the content of entry entry_idx."""
+        if not 0 <= entry_idx < len(self._entry_line_starts):
+            return
+        # The entry's display lines are lines start to end-1.
+        start = self._entry_line_starts[entry_idx]
+        if entry_idx + 1 < len(self._entry_line_starts):
+            end = self._entry_line_starts[entry_idx + 1]
+        else:
+            end = len(self._dl_text)
+        new_line_index = bisect.bisect_right(self._dl_offset, target_offset, start, end) - 1
+        line_text = self._dl_text[new_line_index]
+        new_cursor_pos = min(target_offset - self._dl_offset[new_line_index], len(line_text))
         # If exactly at end of a line and a next wrapped line exists for the same entry, jump to next line.
-        if new_line_index is not None:
-            current_line = self.display_lines[new_line_index]
-            if new_cursor_pos == len(current_line[2]):
-                next_index = new_line_index + 1
-                if next_index < len(self.display_lines) and self.display_lines[next_index][0] == entry_idx:
-                    new_line_index = next_index
-                    new_cursor_pos = 0
-        if new_line_index is not None:
-            self.cursor_display_line = new_line_index
-            self.cursor_field = 'content'
-            self.cursor_pos = new_cursor_pos
+        if new_cursor_pos == len(line_text) and new_line_index + 1 < end:
+            new_line_index += 1
+            new_cursor_pos = 0
+        self.cursor_display_line = new_line_index
+        self.cursor_field = 'content'
+        self.cursor_pos = new_cursor_pos
 
     def move_entry_up(self):
         """Move the current entry up one position."""
         self.save_undo_state()
-        entry_idx, offset, _ = self.display_lines[self.cursor_display_line]
+        self._dirty = True
+        entry_idx = self._dl_entry[self.cursor_display_line]
+        offset = self._dl_offset[self.cursor_display_line]
         
         # If this is a continuation line (not the first line of an entry),
         # we need to split the entry at this point
@@ -475,14 +668,9 @@ class Editor:
             first_part = entry.text[:offset]
             second_part = entry.text[offset:]
             
-            # Update the current entry with just the first part
-            entry.text = first_part
-            
-            # Create a new entry with the second part
-            new_entry = DialogueEntry(entry.speaker, second_part)
-            
-            # Insert the new entry after the current one
-            self.entries.insert(entry_idx + 1, new_entry)
+            # Replace the current entry with one for each part
+            self.entries[entry_idx:entry_idx + 1] = [DialogueEntry(entry.speaker, first_part),
+                                                     DialogueEntry(entry.speaker, second_part)]
             
             # Update entry_idx to point to the new entry
             entry_idx += 1
@@ -499,17 +687,16 @@ class Editor:
         self.reflow()
         
         # Update cursor position to follow the moved entry
-        for i, (e_idx, off, _) in enumerate(self.display_lines):
-            if e_idx == entry_idx - 1 and off == 0:  # The entry is now at index-1
-                self.cursor_display_line = i
-                break
+        self.cursor_display_line = self._entry_line_starts[entry_idx - 1]  # The entry is now at index-1
                 
         self.status_msg = "Moved entry up"
     
     def move_entry_down(self):
         """Move the current entry down one position."""
         self.save_undo_state()
-        entry_idx, offset, _ = self.display_lines[self.cursor_display_line]
+        self._dirty = True
+        entry_idx = self._dl_entry[self.cursor_display_line]
+        offset = self._dl_offset[self.cursor_display_line]
         
         # If this is a continuation line (not the first line of an entry),
         # we need to split the entry at this point
@@ -521,14 +708,9 @@ class Editor:
             first_part = entry.text[:offset]
             second_part = entry.text[offset:]
             
-            # Update the current entry with just the first part
-            entry.text = first_part
-            
-            # Create a new entry with the second part
-            new_entry = DialogueEntry(entry.speaker, second_part)
-            
-            # Insert the new entry after the current one
-            self.entries.insert(entry_idx + 1, new_entry)
+            # Replace the current entry with one for each part
+            self.entries[entry_idx:entry_idx + 1] = [DialogueEntry(entry.speaker, first_part),
+                                                     DialogueEntry(entry.speaker, second_part)]
             
             # Update entry_idx to point to the new entry
             entry_idx += 1
@@ -537,10 +719,7 @@ class Editor:
             self.reflow()
             
             # Find the new position of the second part
-            for i, (e_idx, off, _) in enumerate(self.display_lines):
-                if e_idx == entry_idx and off == 0:
-                    self.cursor_display_line = i
-                    break
+            self.cursor_display_line = self._entry_line_starts[entry_idx]
         
         # Can't move down if it's the last entry
         if entry_idx >= len(self.entries) - 1:
@@ -554,16 +733,15 @@ class Editor:
         self.reflow()
         
         # Update cursor position to follow the moved entry
-        for i, (e_idx, off, _) in enumerate(self.display_lines):
-            if e_idx == entry_idx + 1 and off == 0:  # The entry is now at index+1
-                self.cursor_display_line = i
-                break
+        self.cursor_display_line = self._entry_line_starts[entry_idx + 1]  # The entry is now at index+1
                 
         self.status_msg = "Moved entry down"
 
     def split_line_at_cursor(self):
         """Split the current line at the cursor position into two separate entries."""
-        entry_idx, offset, _ = self.display_lines[self.cursor_display_line]
+        self._dirty = True
+        entry_idx = self._dl_entry[self.cursor_display_line]
+        offset = self._dl_offset[self.cursor_display_line]
         entry = self.entries[entry_idx]
         
         # Calculate the actual position in the entry's text
@@ -578,24 +756,16 @@ class Editor:
         first_part = entry.text[:actual_pos]
         second_part = entry.text[actual_pos:]
         
-        # Update the current entry with just the first part
-        entry.text = first_part
-        
-        # Create a new entry with the second part and same speaker
-        new_entry = DialogueEntry(entry.speaker, second_part)
-        
-        # Insert the new entry after the current one
-        self.entries.insert(entry_idx + 1, new_entry)
+        # Replace the current entry with one for each part (same speaker)
+        self.entries[entry_idx:entry_idx + 1] = [DialogueEntry(entry.speaker, first_part),
+                                                 DialogueEntry(entry.speaker, second_part)]
         
         # Reflow to update display
         self.reflow()
         
         # Position cursor at the beginning of the new entry
-        for i, (e_idx, off, _) in enumerate(self.display_lines):
-            if e_idx == entry_idx + 1 and off == 0:
-                self.cursor_display_line = i
-                self.cursor_pos = 0
-                break
+        self.cursor_display_line = self._entry_line_starts[entry_idx + 1]
+        self.cursor_pos = 0
                 
         self.status_msg = f"Split line at cursor (pos {actual_pos})"
 
@@ -608,12 +778,24 @@ class Editor:
         return ".unnamed.swp"
 
     def autosave(self):
-        """Save to a swap file."""
+        """Save to a swap file, if anything changed since the last autosave."""
+        if not self._dirty:
+            return
+        text = self.format_entries()
+        if text == self._autosaved_text:
+            # Edits since the last autosave cancelled out (e.g. undo).
+            self._dirty = False
+            return
         swap_file = self.get_swap_filename()
         try:
-            with open(swap_file, 'w') as f:
-                for entry in self.entries:
-                    f.write(f"{entry.speaker}\t{entry.text}\n")
+            # Write to a temporary file and rename it over the swap file so a
+            # crash mid-write never leaves a truncated swap file behind.
+            tmp_file = swap_file + ".tmp"
+            with open(tmp_file, 'w', buffering=1 << 17) as f:
+                f.write(text)
+            os.replace(tmp_file, swap_file)
+            self._dirty = False
+            self._autosaved_text = text
             self.status_msg = f"Autosaved to {swap_file}"
         except Exception as e:
             self.status_msg = f"Error autosaving: {e}"
@@ -622,10 +804,9 @@ class Editor:
 
     def save_undo_state(self):
         """Save the current state to the undo stack."""
-        # Create deep copies of entries to avoid reference issues
-        entries_copy = []
-        for entry in self.entries:
-            entries_copy.append(DialogueEntry(entry.speaker, entry.text))
+        # Entries are never mutated in place, so a tuple of references is a
+        # complete snapshot; unchanged entries are shared between states.
+        entries_copy = tuple(self.entries)
             
         # Save cursor state too
         cursor_state = {
@@ -635,27 +816,24 @@ class Editor:
             'scroll_offset': self.scroll_offset
         }
         
-        # Add to undo stack (limit stack size to prevent memory issues)
-        if len(self.undo_stack) >= 100:
-            self.undo_stack.pop(0)  # Remove oldest state
+        # Add to undo stack (maxlen drops the oldest state to prevent memory issues)
         self.undo_stack.append((entries_copy, cursor_state))
 
     def undo(self):
         """Restore the previous state from the undo stack."""
+        # The bottom of the stack is the oldest state we can return to (the
+        # loaded file, until it is evicted); every other element is the state
+        # from just before an edit.
         if len(self.undo_stack) <= 1:
             self.status_msg = "Nothing to undo"
             return
             
-        # Remove current state
-        self.undo_stack.pop()
-            
-        # Get the previous state
-        entries_copy, cursor_state = self.undo_stack[-1]
+        # Take the state from before the most recent edit
+        entries_copy, cursor_state = self.undo_stack.pop()
         
         # Restore entries
-        self.entries = []
-        for entry in entries_copy:
-            self.entries.append(DialogueEntry(entry.speaker, entry.text))
+        self.entries = list(entries_copy)
+        self._dirty = True
             
         # Restore cursor state
         self.cursor_display_line = cursor_state['cursor_display_line']
@@ -675,7 +853,8 @@ def main(stdscr):
     editor = Editor(stdscr, filename)
     while True:
         try:
-            editor.render()
+            if editor._needs_render:
+                editor.render()
             key = stdscr.getch()
             editor.process_key(key)
         except KeyboardInterrupt: